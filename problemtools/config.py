@@ -2,6 +2,11 @@ import collections
 import os
 import yaml
 
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
 
 class ConfigError(Exception):
     pass
@@ -23,7 +28,7 @@ def load_config(configuration_file):
         if os.path.isfile(path):
             try:
                 with open(path, 'r') as config:
-                    new_config = yaml.safe_load(config.read())
+                    new_config = safe_load_yaml(config.read())
             except (yaml.parser.ParserError, yaml.parser.ScannerError) as err:
                 raise ConfigError('Config file %s: failed to parse: %s' % (path, err))
         if res is None:
@@ -37,6 +42,18 @@ def load_config(configuration_file):
     return res
 
 
+def safe_load_yaml(stream):
+    """Parse a YAML document without constructing arbitrary objects.
+
+    Equivalent to yaml.safe_load, but uses the libyaml-backed C parser
+    when PyYAML has been built with it.
+
+    Args:
+        stream: string or open file containing the YAML document.
+    """
+    return yaml.load(stream, Loader=_SafeLoader)
+
+
 def __config_file_paths():
     """
     Paths in which to look for config files, by increasing order of
@@ -29,7 +29,10 @@ class Program(object):
 
         Returns:
             pair (status, runtime):
-               status (int): exit status of the process
+               status (int): exit status of the process, encoded as
+                   returned by os.wait4() (i.e., not the plain exit
+                   code).  Use os.WIFEXITED()/os.WEXITSTATUS() and
+                   os.WIFSIGNALED()/os.WTERMSIG() to decode it.
                runtime (float): user+sys runtime of the process, in seconds
         """
         runcmd = self.get_runcmd(memlim=memlim)
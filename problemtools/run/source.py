@@ -75,6 +75,7 @@ class SourceCode(Program):
         self.Mainclass = self.mainclass[0].upper() + self.mainclass[1:]
 
         self.binary = os.path.join(self.path, 'run')
+        self._runcmd_cache = {}
 
 
     def code_size(self):
@@ -128,13 +129,16 @@ class SourceCode(Program):
                 relevant for languages where memory limit is passed on
                 command line)
         """
-        self.compile()
-        subs = self.__get_substitution(memlim)
-        if cwd is not None:
-            subs['path'] = os.path.relpath(subs['path'], cwd)
-            subs['binary'] = os.path.relpath(subs['binary'], cwd)
-            subs['mainfile'] = os.path.relpath(subs['mainfile'], cwd)
-        return shlex.split(self.language.run.format(**subs))
+        key = (cwd, memlim)
+        if key not in self._runcmd_cache:
+            self.compile()
+            subs = self.__get_substitution(memlim)
+            if cwd is not None:
+                subs['path'] = os.path.relpath(subs['path'], cwd)
+                subs['binary'] = os.path.relpath(subs['binary'], cwd)
+                subs['mainfile'] = os.path.relpath(subs['mainfile'], cwd)
+            self._runcmd_cache[key] = shlex.split(self.language.run.format(**subs))
+        return list(self._runcmd_cache[key])
 
 
     def should_skip_memory_rlimit(self):
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import pytest
+import yaml
 
 from problemtools import config
 
@@ -49,3 +50,11 @@ def test_update_dict():
 
     update_dict(dict1, dict3)
     assert dict1 == {'a': 0, 'b': 12, 'c': 3}
+
+
+def test_safe_load_yaml():
+    assert config.safe_load_yaml('a: 1\nb: [x, y]\n') == {'a': 1, 'b': ['x', 'y']}
+    assert config.safe_load_yaml('') is None
+
+    with pytest.raises(yaml.YAMLError):
+        config.safe_load_yaml('!!python/object/apply:os.system ["true"]')
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from problemtools import languages
+from problemtools.run import SourceCode
+
+
+def make_source(tmpdir):
+    src = tmpdir.join('prog.zoo')
+    src.write('This is a Zoo file')
+    lang = languages.Language('zoo', {'name': 'Zoo',
+                                      'priority': 1,
+                                      'files': '*.zoo',
+                                      'run': '{binary} {memlim}'})
+    return SourceCode(str(src), lang, work_dir=str(tmpdir.mkdir('work')))
+
+
+def test_runcmd_returns_copy(tmpdir):
+    prog = make_source(tmpdir)
+    first = prog.get_runcmd()
+    assert first == [prog.binary, '1024']
+    first.append('extra')
+    first[0] = 'mangled'
+    assert prog.get_runcmd() == [prog.binary, '1024']
+
+
+def test_runcmd_depends_on_memlim_and_cwd(tmpdir):
+    prog = make_source(tmpdir)
+    assert prog.get_runcmd() == [prog.binary, '1024']
+    assert prog.get_runcmd(memlim=2048) == [prog.binary, '2048']
+    assert prog.get_runcmd(cwd=prog.path) == ['run', '1024']
+    assert prog.get_runcmd(cwd=prog.path, memlim=512) == ['run', '512']
+    assert prog.get_runcmd() == [prog.binary, '1024']
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import pytest
+
+# verifyproblem pulls in problem2html, which needs plasTeX
+pytest.importorskip('plasTeX')
+
+from problemtools import languages
+from problemtools import run
+from problemtools import verifyproblem
+
+
+class FakeConfig(object):
+    def __init__(self, data):
+        self._data = data
+
+    def get(self, key=None):
+        if key:
+            return self._data[key]
+        return self._data
+
+
+class FakeProblem(object):
+    def __init__(self, probdir, tmpdir, config, language_config=None):
+        self.probdir = probdir
+        self.tmpdir = tmpdir
+        self.config = FakeConfig(config)
+        self.language_config = language_config
+        self.testcase_by_infile = {}
+
+
+def write_file(path, contents=''):
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as f:
+        f.write(contents)
+
+
+def test_submissions_check_order_and_filter(tmpdir, monkeypatch):
+    probdir = str(tmpdir.mkdir('problem'))
+    subdir = os.path.join(probdir, 'submissions')
+    write_file(os.path.join(subdir, 'accepted', 'a.zoo'), 'a')
+    write_file(os.path.join(subdir, 'accepted', 'b.zoo'), 'b' * 2048)
+    write_file(os.path.join(subdir, 'wrong_answer', 'c.zoo'), 'c')
+    write_file(os.path.join(subdir, 'time_limit_exceeded', 'd.zoo'), 'd')
+
+    # A language whose compiler always fails, so that no submission
+    # gets as far as being run.
+    lang_config = languages.Languages({'zoo': {'name': 'Zoo',
+                                               'priority': 1,
+                                               'files': '*.zoo',
+                                               'compile': '/bin/false {files}',
+                                               'run': '{binary}'}})
+    problem = FakeProblem(probdir, str(tmpdir.mkdir('work')),
+                          {'limits': {'time_multiplier': 5,
+                                      'time_safety_margin': 2,
+                                      'code': 1}},
+                          language_config=lang_config)
+    submissions = verifyproblem.Submissions(problem)
+
+    errors = []
+    monkeypatch.setattr(verifyproblem.Submissions, 'error',
+                        lambda self, msg, additional_info=None: errors.append(msg))
+    compiled = []
+    orig_compile = run.SourceCode.compile
+    def compile(self):
+        compiled.append(self.name)
+        return orig_compile(self)
+    monkeypatch.setattr(run.SourceCode, 'compile', compile)
+
+    args = verifyproblem.default_args()
+    args.submission_filter = re.compile('accepted|wrong_answer')
+    submissions.check(args)
+
+    assert errors == [
+        'Compile error for AC submission a.zoo (Zoo)',
+        'AC submission b.zoo (Zoo) has size 2.0 kiB, exceeds code size limit of 1 kiB',
+        'Compile error for WA submission c.zoo (Zoo)',
+    ]
+    # Neither the oversized submission nor the one excluded by the
+    # submission filter may be compiled.
+    assert set(compiled) == set(['a.zoo', 'c.zoo'])
+
+
+def listdir_items(datadir):
+    """Test data discovery as done before TestCaseGroup used scandir."""
+    items = []
+    for f in sorted(os.listdir(datadir)):
+        f = os.path.join(datadir, f)
+        if os.path.isdir(f):
+            items.append(('group', f, listdir_items(f)))
+        else:
+            base, ext = os.path.splitext(f)
+            if ext == '.ans' and os.path.isfile(base + '.in'):
+                items.append(('case', base))
+    return items
+
+
+def group_items(group):
+    items = []
+    for item in group._items:
+        if isinstance(item, verifyproblem.TestCaseGroup):
+            items.append(('group', item._datadir, group_items(item)))
+        else:
+            items.append(('case', item._base))
+    return items
+
+
+@pytest.mark.parametrize('use_scandir', [True, False])
+def test_testcasegroup_discovery(tmpdir, monkeypatch, use_scandir):
+    if not use_scandir:
+        monkeypatch.setattr(verifyproblem, 'scandir', None)
+    probdir = str(tmpdir.mkdir('problem'))
+    datadir = os.path.join(probdir, 'data')
+    for name in ['sample/1.in', 'sample/1.ans',
+                 'secret/10.in', 'secret/10.ans',
+                 'secret/2.in', 'secret/2.ans',
+                 'secret/orphan.ans',
+                 'secret/noans.in',
+                 'secret/weird.ans',
+                 'secret/weird.in/x.in', 'secret/weird.in/x.ans',
+                 'secret/group/nested/3.in', 'secret/group/nested/3.ans']:
+        write_file(os.path.join(datadir, name))
+    os.symlink(os.path.join(datadir, 'sample'), os.path.join(datadir, 'secret', 'linked'))
+
+    problem = FakeProblem(probdir, str(tmpdir.mkdir('work')),
+                          {'grading': {}, 'type': 'pass-fail'})
+    root = verifyproblem.TestCaseGroup(problem, datadir)
+
+    secret = os.path.join(datadir, 'secret')
+    assert group_items(root) == listdir_items(datadir)
+    assert group_items(root) == [
+        ('group', os.path.join(datadir, 'sample'), [
+            ('case', os.path.join(datadir, 'sample', '1'))]),
+        ('group', secret, [
+            ('case', os.path.join(secret, '10')),
+            ('case', os.path.join(secret, '2')),
+            ('group', os.path.join(secret, 'group'), [
+                ('group', os.path.join(secret, 'group', 'nested'), [
+                    ('case', os.path.join(secret, 'group', 'nested', '3'))])]),
+            ('group', os.path.join(secret, 'linked'), [
+                ('case', os.path.join(secret, 'linked', '1'))]),
+            ('group', os.path.join(secret, 'weird.in'), [
+                ('case', os.path.join(secret, 'weird.in', 'x'))]),
+        ]),
+    ]
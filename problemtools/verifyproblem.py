@@ -10,13 +10,25 @@ import signal
 import re
 import shutil
 import logging
-import yaml
 import tempfile
 import sys
 import copy
 import random
+import multiprocessing
 from argparse import ArgumentParser, ArgumentTypeError
 
+# subprocess is not thread-safe on Python 2, so only compile
+# concurrently on Python 3 (even if the futures backport is installed).
+if sys.version_info[0] >= 3:
+    from concurrent import futures
+else:
+    futures = None
+
+try:
+    from os import scandir
+except ImportError:
+    scandir = None
+
 from . import problem2pdf
 from . import problem2html
 
@@ -34,7 +46,11 @@ def is_TLE(status, may_signal_with_usr1=False):
 def is_RTE(status):
     return not os.WIFEXITED(status) or os.WEXITSTATUS(status)
 
-class SubmissionResult:
+class SubmissionResult(object):
+    __slots__ = ('verdict', 'score', 'testcase', 'reason', 'additional_info',
+                 'runtime', 'runtime_testcase', 'ac_runtime', 'ac_runtime_testcase',
+                 'validator_first', 'sample_failures')
+
     def __init__(self, verdict, score=None, testcase=None, reason=None, additional_info=None):
         self.verdict = verdict
         self.score = score
@@ -135,6 +151,7 @@ class TestCase(ProblemAspect):
         self.infile = base + '.in'
         self.ansfile = base + '.ans'
         self._problem = problem
+        self._name = self.strip_path_prefix(base)
         self.testcasegroup = testcasegroup
         self.reuse_result_from = None
         self._result_cache = (None, None)
@@ -153,7 +170,7 @@ class TestCase(ProblemAspect):
         return os.path.relpath(path, os.path.join(self._problem.probdir, 'data'))
 
     def is_in_sample_group(self):
-        return self.strip_path_prefix(self.infile).startswith('sample')
+        return self._name.startswith('sample')
 
     def check(self, args):
         if self._check_res is not None:
@@ -181,10 +198,10 @@ class TestCase(ProblemAspect):
         return self._check_res
 
     def __str__(self):
-        return 'test case %s' % self.strip_path_prefix(self._base)
+        return 'test case %s' % self._name
 
     def matches_filter(self, filter_re):
-        return filter_re.search(self.strip_path_prefix(self._base)) is not None
+        return filter_re.search(self._name) is not None
 
     def set_symlinks(self):
         if not os.path.islink(self.infile):
@@ -287,6 +304,25 @@ class TestCase(ProblemAspect):
         return [self._base]
 
 
+class _ListdirEntry(object):
+    """Minimal stand-in for os.DirEntry on Pythons without os.scandir."""
+    def __init__(self, dirname, name):
+        self.name = name
+        self.path = os.path.join(dirname, name)
+
+    def is_dir(self):
+        return os.path.isdir(self.path)
+
+    def is_file(self):
+        return os.path.isfile(self.path)
+
+
+def _scandir(path):
+    if scandir is not None:
+        return scandir(path)
+    return [_ListdirEntry(path, name) for name in os.listdir(path)]
+
+
 class TestCaseGroup(ProblemAspect):
     _DEFAULT_CONFIG = config.load_config('testdata.yaml')
     _SCORING_ONLY_KEYS = ['accept_score', 'reject_score', 'range']
@@ -301,7 +337,7 @@ class TestCaseGroup(ProblemAspect):
         if os.path.isfile(configfile):
             try:
                 with open(configfile) as f:
-                    self.config = yaml.safe_load(f)
+                    self.config = config.safe_load_yaml(f)
             except Exception as e:
                 self.error(e)
                 self.config = {}
@@ -337,14 +373,15 @@ class TestCaseGroup(ProblemAspect):
 
         self._items = []
         if os.path.isdir(datadir):
-            for f in sorted(os.listdir(datadir)):
-                f = os.path.join(datadir, f)
-                if os.path.isdir(f):
-                    self._items.append(TestCaseGroup(problem, f, self))
+            entries = dict((entry.name, entry) for entry in _scandir(datadir))
+            for name in sorted(entries):
+                if entries[name].is_dir():
+                    self._items.append(TestCaseGroup(problem, os.path.join(datadir, name), self))
                 else:
-                    base, ext = os.path.splitext(f)
-                    if ext == '.ans' and os.path.isfile(base + '.in'):
-                        self._items.append(TestCase(problem, base, self))
+                    base, ext = os.path.splitext(name)
+                    infile = entries.get(base + '.in')
+                    if ext == '.ans' and infile is not None and infile.is_file():
+                        self._items.append(TestCase(problem, os.path.join(datadir, base), self))
 
         if not parent:
             self.set_symlinks()
@@ -362,11 +399,15 @@ class TestCaseGroup(ProblemAspect):
         return True
 
 
+    _all_testcases = None
+
     def get_all_testcases(self):
-        res = []
-        for child in self._items:
-            res += child.get_all_testcases()
-        return res
+        if self._all_testcases is None:
+            res = []
+            for child in self._items:
+                res += child.get_all_testcases()
+            self._all_testcases = res
+        return self._all_testcases
 
 
     def get_testcases(self):
@@ -462,7 +503,7 @@ class TestCaseGroup(ProblemAspect):
                     if filepath.endswith('.in') and not os.path.islink(filepath):
                         md5 = hashlib.md5()
                         with open(filepath, 'rb') as f:
-                            for buf in iter(lambda: f.read(1024), b''):
+                            for buf in iter(lambda: f.read(1024 * 1024), b''):
                                 md5.update(buf)
                         filehash = md5.digest()
                         hashes[filehash].append(os.path.relpath(filepath, self._problem.probdir))
@@ -472,12 +513,14 @@ class TestCaseGroup(ProblemAspect):
 
         infiles = glob.glob(os.path.join(self._datadir, '*.in'))
         ansfiles = glob.glob(os.path.join(self._datadir, '*.ans'))
+        infile_set = set(infiles)
+        ansfile_set = set(ansfiles)
 
         for f in infiles:
-            if not f[:-3] + '.ans' in ansfiles:
+            if not f[:-3] + '.ans' in ansfile_set:
                 self.error("No matching answer file for input '%s'" % f)
         for f in ansfiles:
-            if not f[:-4] + '.in' in infiles:
+            if not f[:-4] + '.in' in infile_set:
                 self.error("No matching input file for answer '%s'" % f)
 
         # Check whether a <= b according to a natural sorting where numeric components
@@ -594,7 +637,7 @@ class ProblemConfig(ProblemAspect):
         if os.path.isfile(self.configfile):
             try:
                 with open(self.configfile) as f:
-                    self._data = yaml.safe_load(f)
+                    self._data = config.safe_load_yaml(f)
                 # Loading empty yaml yields None, for no apparent reason...
                 if self._data is None:
                     self._data = {}
@@ -963,6 +1006,7 @@ class InputFormatValidators(ProblemAspect):
 
 class Graders(ProblemAspect):
     _default_grader = run.get_tool('default_grader')
+    _OUTPUT_REGEXP = re.compile(r'^((AC)|(WA)|(TLE)|(RTE)|(JE))\s+[0-9.]+\s*$')
 
     def __init__(self, problem):
         self._problem = problem
@@ -995,7 +1039,6 @@ class Graders(ProblemAspect):
             graders = self._graders
 
         grader_input = ''.join(['%s %s\n' % (r.verdict, 0 if r.score is None else r.score) for r in sub_results])
-        grader_output_re = r'^((AC)|(WA)|(TLE)|(RTE)|(JE))\s+[0-9.]+\s*$'
         verdict = 'AC'
         score = 0
 
@@ -1028,9 +1071,9 @@ class Graders(ProblemAspect):
                     self.debug('Grader input: %s\n' % grader_input)
                     return ('JE', None)
 
-                if not re.match(grader_output_re, grader_output):
+                if not Graders._OUTPUT_REGEXP.match(grader_output):
                     self.error('Judge error: invalid format of grader output')
-                    self.debug('Output must match: "%s"' % grader_output_re)
+                    self.debug('Output must match: "%s"' % Graders._OUTPUT_REGEXP.pattern)
                     self.debug('Output was: "%s"' % grader_output)
                     return ('JE', None)
 
@@ -1046,6 +1089,8 @@ class Graders(ProblemAspect):
 
 class OutputValidators(ProblemAspect):
     _default_validator = run.get_tool('default_validator')
+    _interactive = run.get_tool('interactive')
+    _INTERACTIVE_OUTPUT_REGEXP = re.compile(r'\d+ \d+\.\d+ \d+ \d+\.\d+ (validator|submission)')
 
 
     def __init__(self, problem):
@@ -1166,9 +1211,8 @@ class OutputValidators(ProblemAspect):
 
 
     def validate_interactive(self, testcase, submission, timelim, errorhandler):
-        interactive_output_re = r'\d+ \d+\.\d+ \d+ \d+\.\d+ (validator|submission)'
         res = SubmissionResult('JE')
-        interactive = run.get_tool('interactive')
+        interactive = OutputValidators._interactive
         if interactive is None:
             errorhandler.error('Could not locate interactive runner')
             return res
@@ -1193,7 +1237,7 @@ class OutputValidators(ProblemAspect):
                 else:
                     interactive_output = open(interactive_out).read()
                     errorhandler.debug('Interactive output: "%s"' % interactive_output)
-                    if not re.match(interactive_output_re, interactive_output):
+                    if not OutputValidators._INTERACTIVE_OUTPUT_REGEXP.match(interactive_output):
                         errorhandler.error('Output from interactive does not follow expected format, got output "%s"' % interactive_output)
                     else:
                         val_status, _, sub_status, sub_runtime, first = interactive_output.split()
@@ -1311,6 +1355,34 @@ class Submissions(ProblemAspect):
 
         return result1
 
+    def _selected_submissions(self, args):
+        """Yield the submissions to check, in the order they are checked.
+
+        Yields a tuple (verdict, submission, too_large) for every
+        submission matching the submission filter, where too_large is
+        True if the submission exceeds the code size limit (such
+        submissions are not compiled or run).
+        """
+        code_limit = 1024*self._problem.config.get('limits')['code']
+        for verdict in Submissions._VERDICTS:
+            for sub in self._submissions[verdict[0]]:
+                if args.submission_filter.search(os.path.join(verdict[1], sub.name)):
+                    yield verdict[0], sub, sub.code_size() > code_limit
+
+    @staticmethod
+    def _precompile(subs):
+        """Compile a list of submissions concurrently.
+
+        Compile results are cached by the programs, so the sequential
+        checks later on pick them up (and report errors) in order.  At
+        most one compiler per CPU is run at a time.  On Python 2 this
+        does nothing and submissions are compiled lazily, one at a time.
+        """
+        if futures is None or len(subs) <= 1:
+            return
+        with futures.ThreadPoolExecutor(max_workers=multiprocessing.cpu_count()) as executor:
+            list(executor.map(lambda sub: sub.compile(), subs))
+
     def full_score_finite(self):
         min_score, max_score = self._problem.testdata.get_score_range()
         if self._problem.config.get('grading')['objective'] == 'min':
@@ -1342,6 +1414,9 @@ class Submissions(ProblemAspect):
             timelim = args.fixed_timelim
             timelim_margin = int(round(timelim * safety_margin))
 
+        selected = list(self._selected_submissions(args))
+        self._precompile([sub for _, sub, too_large in selected if not too_large])
+
         for verdict in Submissions._VERDICTS:
             acr = verdict[0]
             if verdict[2] and not self._submissions[acr]:
@@ -1349,23 +1424,24 @@ class Submissions(ProblemAspect):
 
             runtimes = []
 
-            for sub in self._submissions[acr]:
-                if args.submission_filter.search(os.path.join(verdict[1], sub.name)):
-                    self.info('Check %s submission %s' % (acr, sub))
+            for sub_acr, sub, too_large in selected:
+                if sub_acr != acr:
+                    continue
+                self.info('Check %s submission %s' % (acr, sub))
 
-                    if sub.code_size() > 1024*limits['code']:
-                        self.error('%s submission %s has size %.1f kiB, exceeds code size limit of %d kiB' %
-                                   (acr, sub, sub.code_size() / 1024.0, limits['code']))
-                        continue
+                if too_large:
+                    self.error('%s submission %s has size %.1f kiB, exceeds code size limit of %d kiB' %
+                               (acr, sub, sub.code_size() / 1024.0, limits['code']))
+                    continue
 
-                    success, msg = sub.compile()
-                    if not success:
-                        self.error('Compile error for %s submission %s' % (acr, sub),
-                                   additional_info=msg)
-                        continue
+                success, msg = sub.compile()
+                if not success:
+                    self.error('Compile error for %s submission %s' % (acr, sub),
+                               additional_info=msg)
+                    continue
 
-                    res = self.check_submission(sub, args, acr, timelim, timelim_margin_lo, timelim_margin)
-                    runtimes.append(res.runtime)
+                res = self.check_submission(sub, args, acr, timelim, timelim_margin_lo, timelim_margin)
+                runtimes.append(res.runtime)
 
             if acr == 'AC':
                 if len(runtimes) > 0: